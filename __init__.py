@@ -13,20 +13,61 @@ bl_info = {
 }
 
 import bpy
+import math
+import numpy as np
 import os
-import random
 from bpy.props import FloatProperty, IntProperty, BoolProperty, EnumProperty
 from bpy.types import Panel, Operator, PropertyGroup
+from mathutils import Matrix
+
+# cloud_layer base size in meters, scaled up to reach cloud_spread
+_BASE_LAYER_SIZE = 10.0
+
+# Area light settings
+_LIGHT_ENERGY = 10000.0
+_LIGHT_SPREAD_RAD = math.radians(20.0)  # 20 degrees beam spread
+
+# cloud_spread above which Create asks for confirmation and its tooltip warns
+_CREATE_SPREAD_WARNING = 10.0
+# cloud_spread above which the panel draws the Cycles warning box. Higher than
+# _CREATE_SPREAD_WARNING so moderate spreads do not draw the box on every redraw,
+# the confirmation on Create still covers them
+_PANEL_SPREAD_WARNING = 50.0
+
+# Cloud objects shipped in assets.blend
+_CLOUD_MESH_NAMES = ("cloud_layer", "cloud_single", "cloud_sphere")
+
+# ID property marking the source objects appended from assets.blend, its value is the asset name
+_SOURCE_PROP = "cloudcreator_source"
+# ID property holding the mtime of the assets.blend a source came from, as a string
+# since nanosecond mtimes do not fit an int ID property
+_SOURCE_ASSET_PROP = "cloudcreator_asset"
+
+# Name given to the shadow material of each plane
+_SHADOW_MATERIAL_NAME = "CloudCreator_ShadowMaterial"
+
+# Template material the plane materials are copied from, identified by an ID property marker
+_SHADOW_TEMPLATE_NAME = "CloudCreator_ShadowMaterial_Template"
+_TEMPLATE_PROP = "cloudcreator_template"
+
+# assets.blend identity last checked on disk and the names of the matching source objects.
+# Objects are stored by name: Python references to IDs do not survive undo or file reloads.
+_ASSET_CACHE = {"asset_id": None, "objs": {}}
+
+
+# Resolved once, the add-on does not move while it is loaded
+_ADDON_PATH = os.path.dirname(os.path.realpath(__file__))
+_ASSETS_PATH = os.path.join(_ADDON_PATH, "assets", "assets.blend")
 
 
 def get_addon_path():
     """Get the path to the addon directory."""
-    return os.path.dirname(os.path.realpath(__file__))
+    return _ADDON_PATH
 
 
 def get_assets_path():
     """Get the path to the assets.blend file."""
-    return os.path.join(get_addon_path(), "assets", "assets.blend")
+    return _ASSETS_PATH
 
 
 class CloudCreatorProperties(PropertyGroup):
@@ -122,18 +163,48 @@ def rename_material_nodes(material, prefix="CloudCreator"):
             node.label = node.name
 
 
-def set_random_mapping_locations(material, seed):
-    """Set random mapping location values based on seed for all mapping nodes."""
+def get_mapping_location_sockets(material):
+    """Get the Location input sockets of all mapping nodes in a material."""
     if not material or not material.use_nodes:
-        return
+        return []
     
-    random.seed(seed)
+    # Mapping input 1 is Location
+    return [node.inputs[1] for node in material.node_tree.nodes if node.type == 'MAPPING']
+
+
+def write_random_locations(sockets, seed):
+    """Write a random location based on seed into each mapping Location socket."""
+    if not sockets:
+        return
     
-    for node in material.node_tree.nodes:
-        if node.type == 'MAPPING':
-            node.inputs['Location'].default_value[0] = random.uniform(-1000, 1000)
-            node.inputs['Location'].default_value[1] = random.uniform(-1000, 1000)
-            node.inputs['Location'].default_value[2] = random.uniform(-1000, 1000)
+    # Draw all offsets at once and write each location as a single vector assignment
+    offsets = np.random.default_rng(seed).uniform(-1000, 1000, size=(len(sockets), 3)).astype(np.float32)
+    for socket, offset in zip(sockets, offsets):
+        socket.default_value = offset
+
+
+def set_random_mapping_locations(material, seed):
+    """Set random mapping location values based on seed for all mapping nodes."""
+    write_random_locations(get_mapping_location_sockets(material), seed)
+
+
+def randomize_all_mapping_locations(obj, seed):
+    """Set random mapping location values based on seed for all mapping nodes in all materials of an object."""
+    sockets = []
+    for mat in obj.data.materials:
+        sockets.extend(get_mapping_location_sockets(mat))
+    write_random_locations(sockets, seed)
+
+
+def apply_object_scale(obj):
+    """Bake the object scale into its mesh vertices (like Apply Scale, without the operator)."""
+    mesh = obj.data
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    coords.reshape(-1, 3)[:] *= tuple(obj.scale)
+    mesh.vertices.foreach_set("co", coords)
+    mesh.update()
+    obj.scale = (1.0, 1.0, 1.0)
 
 
 def setup_cloud_visibility(obj):
@@ -146,87 +217,135 @@ def setup_shadow_plane_visibility(obj):
     obj.visible_camera = False
 
 
-def load_cloud_mesh(context, mesh_name):
-    """Load a cloud mesh from the assets.blend file."""
-    props = context.scene.cloudcreator
-    assets_path = get_assets_path()
+def find_cloud_source(mesh_name):
+    """Find the source object for a cloud mesh checked against assets.blend this session."""
+    src = bpy.data.objects.get(_ASSET_CACHE["objs"].get(mesh_name, ""))
+    if src and src.get(_SOURCE_PROP) == mesh_name and src.get(_SOURCE_ASSET_PROP) == _ASSET_CACHE["asset_id"]:
+        return src
+    
+    return None
+
+
+def get_cached_asset(assets_path, mesh_name):
+    """Get the stashed source object for a cloud mesh, appending it from assets.blend on a cache miss."""
+    # Sources remembered this session were already checked against assets.blend, skip touching the disk
+    src = find_cloud_source(mesh_name)
+    if src:
+        return src, None
     
-    if not os.path.exists(assets_path):
+    try:
+        asset_id = str(os.stat(assets_path).st_mtime_ns)
+    except OSError:
         return None, f"Assets file not found: {assets_path}"
+    _ASSET_CACHE["asset_id"] = asset_id
     
-    # Load the object from the blend file
-    with bpy.data.libraries.load(assets_path, link=False) as (data_from, data_to):
-        if mesh_name in data_from.objects:
-            data_to.objects = [mesh_name]
+    # Reuse sources saved with the file when they come from the current assets.blend,
+    # remove the ones left behind by an older version (only objects carrying the marker)
+    for obj in [obj for obj in bpy.data.objects if _SOURCE_PROP in obj]:
+        if obj.get(_SOURCE_ASSET_PROP) == asset_id:
+            _ASSET_CACHE["objs"][obj[_SOURCE_PROP]] = obj.name
         else:
-            return None, f"Object '{mesh_name}' not found in assets.blend"
+            bpy.data.objects.remove(obj)
     
-    # Link the object to the scene
-    if data_to.objects and data_to.objects[0]:
-        obj = data_to.objects[0]
-        context.collection.objects.link(obj)
-        
-        # Rename to CloudCreator prefix
-        if mesh_name == "cloud_layer":
-            obj.name = "CloudCreator_Layer"
-        elif mesh_name == "cloud_single":
-            obj.name = "CloudCreator_Single"
-        elif mesh_name == "cloud_sphere":
-            obj.name = "CloudCreator_Sphere"
-        else:
-            obj.name = f"CloudCreator_{mesh_name}"
-        
-        # Set location to cloud height
-        obj.location.z = props.cloud_height
-        
-        # If multiple (cloud_layer), scale based on cloud_spread (X and Y only)
-        if props.multiple and mesh_name == "cloud_layer":
-            # cloud_layer base size is 10m, calculate scale factor to reach target spread
-            base_size = 10.0
-            scale_factor = props.cloud_spread / base_size
-            obj.scale = (scale_factor, scale_factor, 1.0)
-            bpy.context.view_layer.objects.active = obj
-            obj.select_set(True)
-            bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-        
-        # Configure visibility settings for performance
-        setup_cloud_visibility(obj)
-        
-        # Process all materials on the object
-        for mat in obj.data.materials:
-            if mat:
+    src = find_cloud_source(mesh_name)
+    if src:
+        return src, None
+    
+    # Append every missing cloud object in one go, the file open dominates the cost
+    missing = [name for name in _CLOUD_MESH_NAMES if not find_cloud_source(name)]
+    with bpy.data.libraries.load(assets_path, link=False) as (data_from, data_to):
+        if mesh_name not in data_from.objects:
+            return None, f"Object '{mesh_name}' not found in assets.blend"
+        requested = [name for name in missing if name in data_from.objects]
+        data_to.objects = requested
+    
+    # Keep the sources alive without linking them to any scene, and mark them
+    # so they are reused instead of appended again when the file is reopened.
+    # Node names are prefixed here once, copies made per Create inherit them.
+    for name, obj in zip(requested, data_to.objects):
+        if obj:
+            obj.use_fake_user = True
+            obj[_SOURCE_PROP] = name
+            obj[_SOURCE_ASSET_PROP] = asset_id
+            for mat in obj.data.materials:
                 rename_material_nodes(mat, "CloudCreator")
-                set_random_mapping_locations(mat, props.seed)
-        
-        return obj, None
+            _ASSET_CACHE["objs"][name] = obj.name
     
-    return None, "Failed to load object"
+    src = find_cloud_source(mesh_name)
+    if not src:
+        return None, "Failed to load object"
+    
+    return src, None
 
 
-def create_cloud_shadow_plane(context):
-    """Create a plane with cloud shadow material."""
+def load_cloud_mesh(context, mesh_name):
+    """Load a cloud mesh from the assets.blend file."""
     props = context.scene.cloudcreator
+    assets_path = get_assets_path()
     
-    # Initialize random with seed
-    random.seed(props.seed)
-    
-    # Use shadow_spread for plane size
-    plane_size = props.shadow_spread
-    
-    # Create plane
-    bpy.ops.mesh.primitive_plane_add(size=1, location=(0, 0, props.cloud_height))
-    plane = context.active_object
-    plane.name = "CloudCreator_Shadow"
-    
-    # Scale based on size and apply scale
-    plane.scale = (plane_size, plane_size, 1)
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-    
-    # Configure visibility settings (invisible to camera)
-    setup_shadow_plane_visibility(plane)
-    
-    # Create material
-    mat = bpy.data.materials.new(name="CloudCreator_ShadowMaterial")
+    src, error = get_cached_asset(assets_path, mesh_name)
+    if error:
+        return None, error
+    
+    # Copy the source so every Create gets its own mesh and materials
+    obj = src.copy()
+    obj.use_fake_user = False
+    del obj[_SOURCE_PROP]
+    del obj[_SOURCE_ASSET_PROP]
+    obj.data = src.data.copy()
+    for i, mat in enumerate(obj.data.materials):
+        if mat:
+            obj.data.materials[i] = mat.copy()
+    
+    # Configure visibility settings for performance, before linking so the
+    # first depsgraph update already sees them
+    setup_cloud_visibility(obj)
+    
+    # Rename to CloudCreator prefix
+    if mesh_name == "cloud_layer":
+        obj.name = "CloudCreator_Layer"
+    elif mesh_name == "cloud_single":
+        obj.name = "CloudCreator_Single"
+    elif mesh_name == "cloud_sphere":
+        obj.name = "CloudCreator_Sphere"
+    else:
+        obj.name = f"CloudCreator_{mesh_name}"
+    
+    # Set location to cloud height
+    obj.location.z = props.cloud_height
+    
+    # If multiple (cloud_layer), scale based on cloud_spread (X and Y only)
+    if props.multiple and mesh_name == "cloud_layer":
+        # Calculate scale factor to reach target spread
+        scale_factor = props.cloud_spread / _BASE_LAYER_SIZE
+        obj.scale = (scale_factor, scale_factor, 1.0)
+        apply_object_scale(obj)
+    
+    # Randomize the mapping nodes of all materials on the object
+    randomize_all_mapping_locations(obj, props.seed)
+    
+    # Link the object to the scene once it is fully set up
+    context.collection.objects.link(obj)
+    
+    return obj, None
+
+
+def get_shadow_material():
+    """Get the shadow template material, building its node tree on first use."""
+    mat = bpy.data.materials.get(_SHADOW_TEMPLATE_NAME)
+    if mat and mat.get(_TEMPLATE_PROP):
+        return mat
+    
+    # The template may have been renamed, match on the marker only
+    for mat in bpy.data.materials:
+        if mat.get(_TEMPLATE_PROP):
+            return mat
+    
+    # Build the node tree once, later Creates copy it. assets.blend does not ship
+    # a prebuilt shadow material, so the graph is built here rather than appended
+    mat = bpy.data.materials.new(name=_SHADOW_TEMPLATE_NAME)
+    mat.use_fake_user = True
+    mat[_TEMPLATE_PROP] = True
     mat.use_nodes = True
     mat.blend_method = 'BLEND'
     
@@ -246,7 +365,7 @@ def create_cloud_shadow_plane(context):
     node_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
     node_bsdf.location = (300, 0)
     node_bsdf.name = "CloudCreator_BSDF"
-    node_bsdf.inputs['Base Color'].default_value = (0, 0, 0, 1)
+    node_bsdf.inputs[0].default_value = (0, 0, 0, 1)  # Base Color
     
     # Color Ramp
     node_ramp = nodes.new(type='ShaderNodeValToRGB')
@@ -262,57 +381,89 @@ def create_cloud_shadow_plane(context):
     node_noise = nodes.new(type='ShaderNodeTexNoise')
     node_noise.location = (-200, 0)
     node_noise.name = "CloudCreator_Noise"
-    node_noise.inputs['Scale'].default_value = 1.0
-    node_noise.inputs['Detail'].default_value = 5.0
+    node_noise.inputs[2].default_value = 1.0  # Scale
+    node_noise.inputs[3].default_value = 5.0  # Detail
     
     # Mapping node
     node_mapping = nodes.new(type='ShaderNodeMapping')
     node_mapping.location = (-400, 0)
     node_mapping.name = "CloudCreator_Mapping"
-    # Set seeded random location for each axis
-    node_mapping.inputs['Location'].default_value[0] = random.uniform(-1000, 1000)
-    node_mapping.inputs['Location'].default_value[1] = random.uniform(-1000, 1000)
-    node_mapping.inputs['Location'].default_value[2] = random.uniform(-1000, 1000)
     
     # Texture Coordinate node
     node_texcoord = nodes.new(type='ShaderNodeTexCoord')
     node_texcoord.location = (-600, 0)
     node_texcoord.name = "CloudCreator_TexCoord"
     
-    # Link nodes
-    links.new(node_texcoord.outputs['Generated'], node_mapping.inputs['Vector'])
-    links.new(node_mapping.outputs['Vector'], node_noise.inputs['Vector'])
-    links.new(node_noise.outputs['Fac'], node_ramp.inputs['Fac'])
-    links.new(node_ramp.outputs['Color'], node_bsdf.inputs['Alpha'])
-    links.new(node_bsdf.outputs['BSDF'], node_output.inputs['Surface'])
+    # Link nodes (socket indices as of Blender 4.3)
+    links.new(node_texcoord.outputs[0], node_mapping.inputs[0])  # Generated -> Vector
+    links.new(node_mapping.outputs[0], node_noise.inputs[0])  # Vector -> Vector
+    links.new(node_noise.outputs[0], node_ramp.inputs[0])  # Fac -> Fac
+    links.new(node_ramp.outputs[0], node_bsdf.inputs[4])  # Color -> Alpha
+    links.new(node_bsdf.outputs[0], node_output.inputs[0])  # BSDF -> Surface
+    
+    return mat
+
+
+def create_cloud_shadow_plane(context):
+    """Create a plane with cloud shadow material."""
+    props = context.scene.cloudcreator
+    
+    # Use shadow_spread for plane size
+    plane_size = props.shadow_spread
+    
+    # Create plane with its size baked into the vertices
+    half_size = plane_size / 2
+    mesh = bpy.data.meshes.new("CloudCreator_Shadow")
+    mesh.from_pydata(
+        [(-half_size, -half_size, 0), (half_size, -half_size, 0), (half_size, half_size, 0), (-half_size, half_size, 0)],
+        [],
+        [(0, 1, 2, 3)],
+    )
+    mesh.update()
+    plane = bpy.data.objects.new("CloudCreator_Shadow", mesh)
+    plane.location = (0, 0, props.cloud_height)
+    
+    # Configure visibility settings (invisible to camera)
+    setup_shadow_plane_visibility(plane)
+    
+    # Copy the template so every plane keeps its own noise offset
+    mat = get_shadow_material().copy()
+    mat.name = _SHADOW_MATERIAL_NAME
+    mat.use_fake_user = False
+    del mat[_TEMPLATE_PROP]
+    # Seeded on its own rather than sharing a generator with the cloud materials: a shared
+    # generator would make the shadow pattern depend on add_cloud, multiple and cloud_type
+    set_random_mapping_locations(mat, props.seed)
     
     # Assign material to plane
     plane.data.materials.append(mat)
     
+    # Link the plane to the scene once it is fully set up
+    context.collection.objects.link(plane)
+    
     return plane
 
 
 def create_cloud_light(context, shadow_plane):
     """Create an area light above the shadow plane."""
-    import math
     props = context.scene.cloudcreator
     
     # Create area light slightly above the shadow plane
-    light_height = props.cloud_height + 0.5
-    bpy.ops.object.light_add(type='AREA', location=(0, 0, light_height))
-    light = context.active_object
-    light.name = "CloudCreator_Light"
+    light_data = bpy.data.lights.new("CloudCreator_AreaLight", type='AREA')
+    light = bpy.data.objects.new("CloudCreator_Light", light_data)
+    context.collection.objects.link(light)
     
     # Configure the light
-    light.data.name = "CloudCreator_AreaLight"
-    light.data.energy = 10000
-    light.data.shape = 'SQUARE'
-    light.data.size = props.shadow_spread
-    light.data.spread = math.radians(20)  # 20 degrees beam spread
+    light_data.energy = _LIGHT_ENERGY
+    light_data.shape = 'SQUARE'
+    light_data.size = props.shadow_spread
+    light_data.spread = _LIGHT_SPREAD_RAD
     
-    # Parent light to shadow plane
+    # Parent light to shadow plane, offset in the plane's local space
+    # (the plane has identity rotation and scale, so no parent inverse is needed)
     light.parent = shadow_plane
-    light.matrix_parent_inverse = shadow_plane.matrix_world.inverted()
+    light.matrix_parent_inverse = Matrix.Identity(4)
+    light.location = (0, 0, 0.5)
     
     return light
 
@@ -329,7 +480,7 @@ class CLOUDCREATOR_OT_create(Operator):
         props = context.scene.cloudcreator
         
         # Safety warning for large cloud spread with multiple clouds
-        if props.add_cloud and props.multiple and props.cloud_spread > 10:
+        if props.add_cloud and props.multiple and props.cloud_spread > _CREATE_SPREAD_WARNING:
             return context.window_manager.invoke_confirm(self, event)
         
         return self.execute(context)
@@ -368,11 +519,18 @@ class CLOUDCREATOR_OT_create(Operator):
     @classmethod
     def description(cls, context, properties):
         props = context.scene.cloudcreator
-        if props.add_cloud and props.multiple and props.cloud_spread > 10:
-            return "WARNING: Large cloud spread (>10m) with raytracing can be very slow and may crash Cycles. Continue?"
+        if props.add_cloud and props.multiple and props.cloud_spread > _CREATE_SPREAD_WARNING:
+            return f"WARNING: Large cloud spread (>{_CREATE_SPREAD_WARNING:g}m) with raytracing can be very slow and may crash Cycles. Continue?"
         return "Generate clouds with the current settings"
 
 
+def draw_spread_warning(layout):
+    """Draw the large cloud spread warning box."""
+    box = layout.box()
+    box.alert = True
+    box.label(text="Warning: Large spread may crash Cycles!", icon='ERROR')
+
+
 class CLOUDCREATOR_PT_main_panel(Panel):
     """Main panel for CloudCreator in the N-panel."""
     
@@ -389,13 +547,12 @@ class CLOUDCREATOR_PT_main_panel(Panel):
         layout.use_property_split = True
         layout.use_property_decorate = False
         
+        # One column for all settings, groups are spaced with separators
         col = layout.column(align=True)
         col.prop(props, "seed")
         col.prop(props, "cloud_height")
         
-        layout.separator()
-        
-        col = layout.column(align=True)
+        col.separator()
         col.prop(props, "add_cloud")
         
         # Only show cloud options if add_cloud is enabled
@@ -406,16 +563,12 @@ class CLOUDCREATOR_PT_main_panel(Panel):
             if props.multiple:
                 col.prop(props, "cloud_spread")
                 # Show warning for large spread
-                if props.cloud_spread > 10:
-                    box = layout.box()
-                    box.alert = True
-                    box.label(text="Warning: Large spread may crash Cycles!", icon='ERROR')
+                if props.cloud_spread > _PANEL_SPREAD_WARNING:
+                    draw_spread_warning(col)
             else:
                 col.prop(props, "cloud_type")
         
-        layout.separator()
-        
-        col = layout.column(align=True)
+        col.separator()
         col.prop(props, "cloud_shadows")
         
         # Only show shadow options if cloud_shadows is enabled
@@ -423,9 +576,8 @@ class CLOUDCREATOR_PT_main_panel(Panel):
             col.prop(props, "shadow_spread")
             col.prop(props, "add_light")
         
-        layout.separator()
-        
-        layout.operator("cloudcreator.create", text="Create", icon='OUTLINER_OB_POINTCLOUD')
+        col.separator()
+        col.operator("cloudcreator.create", text="Create", icon='OUTLINER_OB_POINTCLOUD')
 
 
 classes = (